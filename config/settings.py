@@ -5,56 +5,83 @@
 import os
 from dotenv import load_dotenv
 
-# 加载环境变量
-load_dotenv()
-
 
 class Config:
-    """应用配置"""
-
-    # OpenAI API
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-    REALTIME_MODEL = os.getenv("REALTIME_MODEL", "gpt-4o-realtime-preview-2024-10-01")
-
-    # WebSocket URL
-    @property
-    def REALTIME_URL(self):
-        return f"wss://api.openai.com/v1/realtime?model={self.REALTIME_MODEL}"
-
-    # 翻译设置
-    SOURCE_LANGUAGE = os.getenv("SOURCE_LANGUAGE", "zh")
-    TARGET_LANGUAGE = os.getenv("TARGET_LANGUAGE", "en")
-
-    # 音频设置
-    SAMPLE_RATE = int(os.getenv("SAMPLE_RATE", "24000"))
-    CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1024"))
-    CHANNELS = 1  # 单声道
-    FORMAT = "pcm16"
-
-    # VAD 设置
-    VAD_THRESHOLD = float(os.getenv("VAD_THRESHOLD", "0.5"))
-    SILENCE_DURATION_MS = int(os.getenv("SILENCE_DURATION_MS", "1000"))
-    PREFIX_PADDING_MS = 300
-
-    # 系统提示词
-    @property
-    def SYSTEM_INSTRUCTIONS(self):
-        return f"""You are a real-time translator.
+    """应用配置（冻结单例：初始化后只读）"""
+
+    # .env 只在首次构造 Config 时加载，避免模块导入的隐式 I/O 副作用
+    _env_loaded = False
+
+    __slots__ = (
+        'OPENAI_API_KEY', 'REALTIME_MODEL', 'REALTIME_URL',
+        'SOURCE_LANGUAGE', 'TARGET_LANGUAGE', 'SYSTEM_INSTRUCTIONS',
+        'SAMPLE_RATE', 'CHUNK_SIZE', 'CHANNELS', 'FORMAT',
+        'AUDIO_BATCH_CHUNKS', 'BINARY_AUDIO',
+        'VAD_THRESHOLD', 'SILENCE_DURATION_MS', 'PREFIX_PADDING_MS',
+        '_frozen',
+    )
+
+    def __init__(self):
+        object.__setattr__(self, '_frozen', False)
+
+        # 加载环境变量（幂等：只有第一次会真正读 .env 文件）
+        if not Config._env_loaded:
+            load_dotenv()
+            Config._env_loaded = True
+
+        # OpenAI API
+        self.OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+        self.REALTIME_MODEL = os.getenv("REALTIME_MODEL", "gpt-4o-realtime-preview-2024-10-01")
+
+        # WebSocket URL（初始化时计算一次，之后作为常量复用）
+        self.REALTIME_URL = f"wss://api.openai.com/v1/realtime?model={self.REALTIME_MODEL}"
+
+        # 翻译设置
+        self.SOURCE_LANGUAGE = os.getenv("SOURCE_LANGUAGE", "zh")
+        self.TARGET_LANGUAGE = os.getenv("TARGET_LANGUAGE", "en")
+
+        # 音频设置
+        self.SAMPLE_RATE = int(os.getenv("SAMPLE_RATE", "24000"))
+        self.CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1024"))
+        self.CHANNELS = 1  # 单声道
+        self.FORMAT = "pcm16"
+
+        # 每次发送合并的音频块数（4 块 ≈ 170ms，摊薄每次发送的 JSON/帧开销）
+        self.AUDIO_BATCH_CHUNKS = int(os.getenv("AUDIO_BATCH_CHUNKS", "4"))
+
+        # 实验特性：以二进制 WebSocket 帧直发 PCM，跳过 base64 编码
+        # （官方 API 目前只接受 base64+JSON，仅供本地代理/将来 API 支持时开启）
+        self.BINARY_AUDIO = os.getenv("BINARY_AUDIO", "false").lower() in ("1", "true", "yes")
+
+        # VAD 设置
+        self.VAD_THRESHOLD = float(os.getenv("VAD_THRESHOLD", "0.5"))
+        self.SILENCE_DURATION_MS = int(os.getenv("SILENCE_DURATION_MS", "1000"))
+        self.PREFIX_PADDING_MS = 300
+
+        # 系统提示词（同样只在初始化时生成一次）
+        self.SYSTEM_INSTRUCTIONS = f"""You are a real-time translator.
 - Translate from {self.SOURCE_LANGUAGE} to {self.TARGET_LANGUAGE}
 - Only provide the translation, no explanations
 - Be natural and preserve the tone
 """
 
-    @classmethod
-    def validate(cls):
+        # 冻结实例：之后的任何赋值都会报错
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False):
+            raise AttributeError(f"Config 已冻结，禁止修改 {name}")
+        object.__setattr__(self, name, value)
+
+    def validate(self):
         """验证配置"""
-        if not cls.OPENAI_API_KEY:
+        if not self.OPENAI_API_KEY:
             raise ValueError("❌ OPENAI_API_KEY not found in .env file")
-        if not cls.OPENAI_API_KEY.startswith("sk-"):
+        if not self.OPENAI_API_KEY.startswith("sk-"):
             raise ValueError("❌ Invalid OPENAI_API_KEY format")
         print("✓ 配置验证通过")
         return True
 
 
 # 创建全局配置实例
-config = Config()
\ No newline at end of file
+config = Config()
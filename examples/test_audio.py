@@ -7,7 +7,6 @@ import time
 sys.path.insert(0, '..')
 
 from src.audio.recorder import AudioRecorder
-from src.audio.processor import AudioProcessor
 from config.settings import config
 
 
@@ -24,9 +23,6 @@ def test_audio_recording():
         channels=config.CHANNELS
     )
 
-    # 创建处理器
-    processor = AudioProcessor()
-
     try:
         # 开始录音
         print("\n开始录音...")
@@ -38,18 +34,10 @@ def test_audio_recording():
         chunks_received = 0
 
         while time.time() - start_time < 3:
-            chunk = recorder.get_audio_chunk()
+            chunk = recorder.get_audio_chunk(block=True, timeout=0.1)
             if chunk:
                 chunks_received += 1
-
-                # 验证音频数据
-                if processor.validate_audio(chunk):
-                    # 转换为 base64
-                    encoded = processor.pcm_to_base64(chunk)
-                    if encoded:
-                        print(f"✓ 接收音频块 {chunks_received}: {len(chunk)} bytes → {len(encoded)} chars (base64)")
-
-            time.sleep(0.01)  # 避免 CPU 占用过高
+                print(f"✓ 接收音频块 {chunks_received}: {len(chunk)} bytes (PCM)")
 
         print(f"\n✓ 录音完成！共接收 {chunks_received} 个音频块")
 
@@ -12,13 +12,13 @@ def test_imports():
 
     tests = []
 
-    # 测试 websocket
+    # 测试 websockets
     try:
-        import websocket
-        print("✓ websocket-client 已安装")
+        import websockets
+        print("✓ websockets 已安装")
         tests.append(True)
     except ImportError:
-        print("✗ websocket-client 未安装")
+        print("✗ websockets 未安装")
         tests.append(False)
 
     # 测试 pyaudio
@@ -111,15 +111,18 @@ def test_pyaudio_devices():
 
         print(f"\n找到 {device_count} 个音频设备：\n")
 
-        input_devices = []
-        for i in range(device_count):
-            info = p.get_device_info_by_index(i)
-            if info['maxInputChannels'] > 0:  # 只显示输入设备
-                input_devices.append(i)
-                print(f"设备 {i}: {info['name']}")
-                print(f"  - 最大输入声道: {info['maxInputChannels']}")
-                print(f"  - 默认采样率: {int(info['defaultSampleRate'])} Hz")
-                print()
+        # 一次性枚举所有设备信息，避免逐个查询的往返开销
+        all_devices = [p.get_device_info_by_index(i) for i in range(device_count)]
+
+        input_devices = [
+            (i, info) for i, info in enumerate(all_devices)
+            if info['maxInputChannels'] > 0  # 只显示输入设备
+        ]
+        for i, info in input_devices:
+            print(f"设备 {i}: {info['name']}")
+            print(f"  - 最大输入声道: {info['maxInputChannels']}")
+            print(f"  - 默认采样率: {int(info['defaultSampleRate'])} Hz")
+            print()
 
         if not input_devices:
             print("✗ 没有找到输入设备（麦克风）")
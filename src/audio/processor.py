@@ -2,7 +2,7 @@
 音频处理模块
 负责音频编码和格式转换
 """
-import base64
+import binascii
 from loguru import logger
 
 
@@ -24,7 +24,9 @@ class AudioProcessor:
             return None
 
         try:
-            return base64.b64encode(pcm_data).decode('utf-8')
+            # b2a_base64 比 b64encode 少一层包装和换行处理，
+            # ASCII 解码也比 UTF-8 更快（输出必然是纯 ASCII）
+            return binascii.b2a_base64(pcm_data, newline=False).decode('ascii')
         except Exception as e:
             logger.error(f"音频编码失败: {e}")
             return None
@@ -34,6 +36,9 @@ class AudioProcessor:
         """
         验证音频数据格式
 
+        边界校验辅助函数：录音线程产出的数据类型和大小有不变量保证
+        （见 AudioRecorder），热路径无需调用；留给测试和外部音频源使用
+
         Args:
             pcm_data: 音频数据
             expected_size: 期望的数据大小（可选）
@@ -2,16 +2,37 @@
 音频录制模块
 负责从麦克风捕获音频
 """
-import pyaudio
 import threading
-from queue import Queue
+from collections import deque
 from loguru import logger
 
+# 模块级缓存的 PyAudio 实例：PortAudio 初始化较慢，重复启动时直接复用
+_pa_instance = None
+
+
+def _get_pa():
+    """获取缓存的 PyAudio 实例（首次调用时创建）"""
+    global _pa_instance
+    if _pa_instance is None:
+        # 延迟导入 pyaudio：PortAudio 初始化较慢，不用录音的脚本无需付出这个开销
+        import pyaudio
+        _pa_instance = pyaudio.PyAudio()
+    return _pa_instance
+
 
 class AudioRecorder:
-    """音频录制器"""
+    """
+    音频录制器
+
+    采用 PortAudio 回调模式：采集由 PortAudio 自己的高优先级线程驱动，
+    Python 侧没有轮询线程，每块音频也不经过额外的缓冲拷贝
 
-    def __init__(self, sample_rate=24000, chunk_size=1024, channels=1):
+    不变量：回调入队的数据一律是 PortAudio 送入的 16-bit PCM bytes
+    （每块 chunk_size * 2 * channels 字节），消费端无需再逐块校验类型
+    和大小；批量聚合与 base64 编码集中在客户端发送时完成
+    """
+
+    def __init__(self, sample_rate=24000, chunk_size=1024, channels=1, encoder=None):
         """
         初始化录音器
 
@@ -19,16 +40,23 @@ class AudioRecorder:
             sample_rate: 采样率 (Hz)
             chunk_size: 每次读取的帧数
             channels: 声道数 (1=单声道)
+            encoder: 音频编码函数，默认原样透传 PCM bytes
         """
         self.sample_rate = sample_rate
         self.chunk_size = chunk_size
         self.channels = channels
+        self.encoder = encoder
 
         self.audio = None
         self.stream = None
-        self.audio_queue = Queue()
+        # 有界 deque + Event 代替 Queue：append/popleft 在 GIL 下本身是原子的，
+        # 省去每块音频两次锁操作；maxlen 在网络卡顿时自动丢弃最旧数据，避免内存膨胀
+        self.audio_deque = deque(maxlen=128)
+        self.data_event = threading.Event()
         self.is_recording = False
-        self.record_thread = None
+
+        self._pa_continue = None  # 在 start() 中从 pyaudio 取值
+        self._pa_complete = None
 
         logger.info(f"初始化录音器: {sample_rate}Hz, {chunk_size} frames, {channels} channel(s)")
 
@@ -39,23 +67,25 @@ class AudioRecorder:
             return
 
         try:
-            # 初始化 PyAudio
-            self.audio = pyaudio.PyAudio()
+            import pyaudio
+
+            # 获取（缓存的）PyAudio 实例
+            self.audio = _get_pa()
 
-            # 打开音频流
+            self._pa_continue = pyaudio.paContinue
+            self._pa_complete = pyaudio.paComplete
+            self.is_recording = True
+
+            # 打开回调模式的音频流：PortAudio 线程直接推送数据，无需 Python 轮询
             self.stream = self.audio.open(
                 format=pyaudio.paInt16,  # 16-bit PCM
                 channels=self.channels,
                 rate=self.sample_rate,
                 input=True,
-                frames_per_buffer=self.chunk_size
+                frames_per_buffer=self.chunk_size,
+                stream_callback=self._on_audio
             )
-
-            self.is_recording = True
-
-            # 启动录音线程
-            self.record_thread = threading.Thread(target=self._record_loop, daemon=True)
-            self.record_thread.start()
+            self.stream.start_stream()
 
             logger.info("✓ 录音已启动")
 
@@ -64,35 +94,37 @@ class AudioRecorder:
             self.stop()
             raise
 
-    def _record_loop(self):
-        """录音循环（在独立线程中运行）"""
-        logger.info("录音线程已启动")
-
-        while self.is_recording:
-            try:
-                # 读取音频数据
-                data = self.stream.read(self.chunk_size, exception_on_overflow=False)
-
-                # 放入队列
-                self.audio_queue.put(data)
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        """PortAudio 回调（运行在 PortAudio 自己的高优先级线程上）"""
+        if not self.is_recording:
+            return (None, self._pa_complete)
 
-            except Exception as e:
-                if self.is_recording:  # 只在仍在录音时记录错误
-                    logger.error(f"录音出错: {e}")
-                break
+        data = self.encoder(in_data) if self.encoder else in_data
+        if data:
+            self.audio_deque.append(data)
+            self.data_event.set()
 
-        logger.info("录音线程已停止")
+        return (None, self._pa_continue)
 
-    def get_audio_chunk(self):
+    def get_audio_chunk(self, block=False, timeout=None):
         """
         从队列获取音频数据
 
+        Args:
+            block: 是否阻塞等待数据
+            timeout: 阻塞等待的超时时间（秒）
+
         Returns:
-            bytes: 音频数据，如果队列为空返回 None
+            bytes: 一批 PCM 音频数据，如果队列为空（或等待超时）返回 None
         """
-        if not self.audio_queue.empty():
-            return self.audio_queue.get()
-        return None
+        if block and not self.audio_deque:
+            self.data_event.wait(timeout)
+
+        try:
+            return self.audio_deque.popleft()
+        except IndexError:
+            self.data_event.clear()
+            return None
 
     def stop(self):
         """停止录音"""
@@ -100,10 +132,6 @@ class AudioRecorder:
 
         self.is_recording = False
 
-        # 等待录音线程结束
-        if self.record_thread and self.record_thread.is_alive():
-            self.record_thread.join(timeout=2)
-
         # 关闭音频流
         if self.stream:
             try:
@@ -114,24 +142,15 @@ class AudioRecorder:
             finally:
                 self.stream = None
 
-        # 终止 PyAudio
-        if self.audio:
-            try:
-                self.audio.terminate()
-            except Exception as e:
-                logger.warning(f"终止 PyAudio 时出错: {e}")
-            finally:
-                self.audio = None
+        # 不终止 PyAudio：实例由模块级缓存持有，重新启动录音时直接复用
+        self.audio = None
 
         # 清空队列
-        while not self.audio_queue.empty():
-            try:
-                self.audio_queue.get_nowait()
-            except:
-                break
+        self.audio_deque.clear()
+        self.data_event.clear()
 
         logger.info("✓ 录音已停止")
 
     def __del__(self):
         """析构函数，确保资源被释放"""
-        self.stop()
\ No newline at end of file
+        self.stop()
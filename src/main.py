@@ -6,8 +6,6 @@ import time
 from loguru import logger
 
 from config.settings import config
-from src.audio.recorder import AudioRecorder
-from src.audio.processor import AudioProcessor
 from src.realtime.client import RealtimeClient
 from src.realtime.events import EventHandler
 
@@ -22,8 +20,10 @@ class RealtimeTranslator:
         # 验证配置
         config.validate()
 
+        # 配置通过后再导入音频模块，避免配置错误时还要等音频库加载
+        from src.audio.recorder import AudioRecorder
+
         # 创建各个组件（暂时不使用 UI）
-        self.processor = AudioProcessor()
         self.event_handler = EventHandler(ui=None)
 
         self.recorder = AudioRecorder(
@@ -35,14 +35,25 @@ class RealtimeTranslator:
         self.client = RealtimeClient(
             api_key=config.OPENAI_API_KEY,
             url=config.REALTIME_URL,
-            event_handler=self.event_handler
+            event_handler=self.event_handler,
+            binary_audio=config.BINARY_AUDIO,
+            # 聚合 AUDIO_BATCH_CHUNKS 块（约 170ms）再发送
+            audio_flush_bytes=config.CHUNK_SIZE * 2 * config.CHANNELS * config.AUDIO_BATCH_CHUNKS
         )
 
         self.is_running = False
 
+        # 会话配置只构建一次，重连时直接复用
+        self._instructions = config.SYSTEM_INSTRUCTIONS
+        self._vad_config = {
+            "type": "server_vad",
+            "threshold": config.VAD_THRESHOLD,
+            "silence_duration_ms": config.SILENCE_DURATION_MS,
+            "prefix_padding_ms": config.PREFIX_PADDING_MS
+        }
+
         # 定时提交配置
         self.force_commit_interval = 8.0  # ← 改为 8 秒
-        self.last_commit_time = None
 
         logger.info("✓ 翻译器初始化完成")
 
@@ -59,16 +70,9 @@ class RealtimeTranslator:
 
             # 配置会话
             print("正在配置翻译会话...")
-            vad_config = {
-                "type": "server_vad",
-                "threshold": config.VAD_THRESHOLD,
-                "silence_duration_ms": config.SILENCE_DURATION_MS,
-                "prefix_padding_ms": config.PREFIX_PADDING_MS
-            }
-
             self.client.configure_session(
-                instructions=config.SYSTEM_INSTRUCTIONS,
-                vad_config=vad_config
+                instructions=self._instructions,
+                vad_config=self._vad_config
             )
 
             time.sleep(1)
@@ -103,33 +107,29 @@ class RealtimeTranslator:
 
         chunks_sent = 0  # 总共发送的音频块数（用于日志）
         chunks_since_last_commit = 0  # 上次提交后发送的音频块数（用于检查）
-        self.last_commit_time = time.time()
+
+        # 用单调时钟预计算下次提交的截止时间，不受系统时间跳变影响
+        next_commit_deadline = time.monotonic() + self.force_commit_interval
 
         while self.is_running:
             try:
-                # 从录音器获取音频块
-                audio_chunk = self.recorder.get_audio_chunk()
+                # 从录音器获取音频块（阻塞等待，避免轮询空转）
+                # base64 编码由客户端在发送时集中完成
+                audio_chunk = self.recorder.get_audio_chunk(block=True, timeout=0.5)
 
                 if audio_chunk:
-                    # 验证音频
-                    if self.processor.validate_audio(audio_chunk):
-                        # 编码为 base64
-                        audio_base64 = self.processor.pcm_to_base64(audio_chunk)
+                    # 发送到 API
+                    self.client.send_audio(audio_chunk)
+                    chunks_sent += 1
+                    chunks_since_last_commit += 1  # ← 关键：同时增加这个计数器
 
-                        if audio_base64:
-                            # 发送到 API
-                            self.client.send_audio(audio_base64)
-                            chunks_sent += 1
-                            chunks_since_last_commit += 1  # ← 关键：同时增加这个计数器
-
-                            if chunks_sent % 100 == 0:
-                                logger.debug(f"已发送 {chunks_sent} 个音频块")
+                    if chunks_sent % 100 == 0:
+                        # lazy=True：只有 DEBUG 级别启用时才格式化
+                        logger.opt(lazy=True).debug("已发送 {} 个音频块",
+                                                    lambda c=chunks_sent: c)
 
                 # 检查是否需要强制提交
-                current_time = time.time()
-                time_since_last_commit = current_time - self.last_commit_time
-
-                if time_since_last_commit >= self.force_commit_interval:
+                if time.monotonic() >= next_commit_deadline:
                     # 只有在有音频的情况下才提交
                     if chunks_since_last_commit > 0:  # ← 关键：检查这个计数器
                         logger.info(f"⏰ 超过 {self.force_commit_interval} 秒，强制提交音频缓冲")
@@ -147,10 +147,7 @@ class RealtimeTranslator:
                         logger.debug("缓冲区为空，跳过强制提交")
 
                     # 重置计时器
-                    self.last_commit_time = current_time
-
-                # 短暂休眠，避免 CPU 占用过高
-                time.sleep(0.01)
+                    next_commit_deadline = time.monotonic() + self.force_commit_interval
 
             except Exception as e:
                 if self.is_running:
@@ -201,7 +198,8 @@ def main():
         "logs/translator_{time}.log",
         rotation="1 day",
         retention="7 days",
-        level="DEBUG"
+        level="DEBUG",
+        enqueue=True  # 日志经后台队列写盘，磁盘卡顿不会阻塞音频发送循环
     )
 
     # 创建并启动翻译器
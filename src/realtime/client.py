@@ -1,18 +1,48 @@
 """
 WebSocket 客户端
 负责与 OpenAI Realtime API 通信
+
+基于 asyncio + websockets：连接在专用线程的事件循环上运行
+（Linux/macOS 下自动启用 uvloop），读、写、解析互不阻塞；
+对外仍暴露同步接口，调用方无需感知事件循环
 """
-import websocket
-import json
+import asyncio
+import ssl
 import threading
+import time
 import certifi
+import orjson
+import websockets
 from loguru import logger
 
+# 可选加速：uvloop 的事件循环比 asyncio 默认实现快得多（仅 Linux/macOS）
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# 可选加速：pysimdjson 的惰性解析可以跳过未使用字段的物化
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+# 可选加速：pybase64 用 SIMD 指令做 base64，编码吞吐是标准库的数倍
+try:
+    import pybase64
+    _b64encode = pybase64.b64encode
+except ImportError:
+    import binascii
+
+    def _b64encode(data):
+        return binascii.b2a_base64(data, newline=False)
+
 
 class RealtimeClient:
     """Realtime API 客户端"""
 
-    def __init__(self, api_key, url, event_handler):
+    def __init__(self, api_key, url, event_handler, binary_audio=False,
+                 audio_flush_bytes=8192, audio_flush_interval=0.1):
         """
         初始化客户端
 
@@ -20,14 +50,45 @@ class RealtimeClient:
             api_key: OpenAI API key
             url: WebSocket URL
             event_handler: 事件处理器
+            binary_audio: 以二进制帧直发 PCM（实验特性，需要服务端支持）
+            audio_flush_bytes: 出站音频聚合到多少字节后发送
+            audio_flush_interval: 距上次发送超过多少秒就强制发送（秒）
         """
         self.api_key = api_key
         self.url = url
         self.event_handler = event_handler
+        self.binary_audio = binary_audio
+
+        # 出站音频聚合：按大小/时间阈值合并 append 事件，摊薄每帧的
+        # JSON/WebSocket 开销。缓冲区预分配一次，通过 memoryview 原地写入，
+        # 稳态零分配（send_audio 的调用方均为同一发送线程，无需加锁）
+        self.audio_flush_bytes = audio_flush_bytes
+        self.audio_flush_interval = audio_flush_interval
+        self._audio_buf = bytearray(audio_flush_bytes)
+        self._audio_mv = memoryview(self._audio_buf)
+        self._audio_len = 0
+        self._audio_last_flush = time.monotonic()
 
-        self.ws = None
         self.is_connected = False
-        self.ws_thread = None
+
+        # 事件循环及其线程；发送队列在循环内创建
+        self._loop = None
+        self._loop_thread = None
+        self._ws = None
+        self._send_q = None
+
+        # 连接建立/失败都会置位该事件，connect() 在其上等待而不是轮询
+        self._connected_event = threading.Event()
+        self._connect_error = None
+
+        # 复用同一个 simdjson Parser（每次 parse 会复用内部缓冲）
+        self._parser = simdjson.Parser() if simdjson else None
+
+        # 音频 append 事件结构固定，预先模板化成 bytes：
+        # 每块音频只做一次 bytes 拼接，完全跳过 dict 构建和 JSON 序列化
+        # （base64 不含需要 JSON 转义的字符，直接拼接是安全的）
+        self._AUDIO_PREFIX = b'{"type":"input_audio_buffer.append","audio":"'
+        self._AUDIO_SUFFIX = b'"}'
 
         logger.info("WebSocket 客户端已初始化")
 
@@ -40,53 +101,112 @@ class RealtimeClient:
         try:
             logger.info(f"正在连接到: {self.url[:50]}...")
 
-            # 创建 WebSocket 连接
-            self.ws = websocket.WebSocketApp(
-                self.url,
-                header={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "OpenAI-Beta": "realtime=v1"
-                },
-                on_open=self._on_open,
-                on_message=self._on_message,
-                on_error=self._on_error,
-                on_close=self._on_close
-            )
-
-            # 在独立线程中运行（使用 certifi 证书）
-            self.ws_thread = threading.Thread(
-                target=lambda: self.ws.run_forever(
-                    sslopt={"ca_certs": certifi.where()}
-                ),
-                daemon=True
-            )
-            self.ws_thread.start()
-
-            # 等待连接建立
-            import time
-            timeout = 10
-            start = time.time()
-            while not self.is_connected and time.time() - start < timeout:
-                time.sleep(0.1)
+            self._connected_event.clear()
+            self._connect_error = None
 
-            if not self.is_connected:
+            # 专用线程运行事件循环（可用时换成 uvloop）
+            self._loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+            self._loop_thread = threading.Thread(target=self._run_loop, daemon=True)
+            self._loop_thread.start()
+
+            # 等待连接建立（事件驱动：连上或失败都会立即唤醒）
+            if not self._connected_event.wait(timeout=10):
                 raise TimeoutError("连接超时")
 
+            if not self.is_connected:
+                raise ConnectionError(f"连接失败: {self._connect_error}")
+
             logger.info("✓ WebSocket 连接成功")
 
         except Exception as e:
             logger.error(f"连接失败: {e}")
             raise
 
-    def _on_open(self, ws):
-        """连接建立回调"""
-        self.is_connected = True
-        logger.info("WebSocket 连接已建立")
+    def _run_loop(self):
+        """事件循环线程入口"""
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._session())
+        finally:
+            self._loop.close()
+
+    async def _session(self):
+        """连接生命周期：读循环 + 发送协程"""
+        # ws:// （本地代理/测试）不走 TLS
+        ssl_ctx = None
+        if self.url.startswith("wss"):
+            ssl_ctx = ssl.create_default_context(cafile=certifi.where())
 
-    def _on_message(self, ws, message):
-        """接收消息回调"""
         try:
-            data = json.loads(message)
+            async with websockets.connect(
+                self.url,
+                additional_headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "OpenAI-Beta": "realtime=v1"
+                },
+                ssl=ssl_ctx
+            ) as ws:
+                self._ws = ws
+                self._send_q = asyncio.Queue()
+                self.is_connected = True
+                self._connected_event.set()
+                logger.info("WebSocket 连接已建立")
+
+                # 发送协程独立消费队列，调用方排队即返回，不等网络
+                writer = asyncio.ensure_future(self._writer(ws))
+
+                try:
+                    async for message in ws:
+                        self._handle_message(message)
+                finally:
+                    writer.cancel()
+
+        except Exception as e:
+            self._connect_error = e
+            logger.error(f"WebSocket 错误: {e}")
+
+        finally:
+            self.is_connected = False
+            self._ws = None
+            self._connected_event.set()
+            logger.info("WebSocket 连接已关闭")
+
+    async def _writer(self, ws):
+        """发送协程：消费队列并写入 socket"""
+        while True:
+            payload, binary = await self._send_q.get()
+            try:
+                await ws.send(payload, text=not binary)
+            except Exception as e:
+                # 发送失败必须立刻暴露：标记断连（让 _submit 返回 False）
+                # 并主动关闭连接结束读循环，而不是把后续帧排进死队列、
+                # 等几十秒后 ping 超时才发现连接早已不可用
+                logger.error(f"发送消息失败，关闭连接: {e}")
+                self.is_connected = False
+                await ws.close()
+                break
+
+    def _handle_message(self, message):
+        """处理一条入站消息（在事件循环线程上运行）"""
+        try:
+            if self._parser is not None and self.event_handler:
+                # 惰性解析：先只取 type，完全不处理的事件不物化成 dict
+                raw = message.encode('utf-8') if isinstance(message, str) else message
+                doc = self._parser.parse(raw)
+                event_type = str(doc["type"])
+
+                logger.debug(f"收到事件: {event_type}")
+
+                if event_type in self.event_handler.PASSIVE_EVENTS:
+                    # 只登记类型，跳过整个 JSON 树的物化
+                    self.event_handler.record_event(event_type)
+                    return
+
+                self.event_handler.handle_event(doc.as_dict())
+                return
+
+            # orjson 直接接受 bytes，省去一次 UTF-8 解码
+            data = orjson.loads(message)
             event_type = data.get("type", "unknown")
 
             logger.debug(f"收到事件: {event_type}")
@@ -95,19 +215,24 @@ class RealtimeClient:
             if self.event_handler:
                 self.event_handler.handle_event(data)
 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"消息解析失败: {e}")
         except Exception as e:
             logger.error(f"处理消息时出错: {e}")
 
-    def _on_error(self, ws, error):
-        """错误回调"""
-        logger.error(f"WebSocket 错误: {error}")
+    def _submit(self, payload, binary=False):
+        """线程安全地把一帧排入发送队列"""
+        if not self.is_connected:
+            logger.warning("WebSocket 未连接，无法发送消息")
+            return False
 
-    def _on_close(self, ws, close_status_code, close_msg):
-        """连接关闭回调"""
-        self.is_connected = False
-        logger.info(f"WebSocket 连接已关闭: {close_status_code} - {close_msg}")
+        try:
+            self._loop.call_soon_threadsafe(self._send_q.put_nowait, (payload, binary))
+            return True
+        except RuntimeError as e:
+            # 事件循环已关闭
+            logger.error(f"发送消息失败: {e}")
+            return False
 
     def send_message(self, message_dict):
         """
@@ -116,31 +241,64 @@ class RealtimeClient:
         Args:
             message_dict: 要发送的消息字典
         """
-        if not self.is_connected:
-            logger.warning("WebSocket 未连接，无法发送消息")
-            return False
-
-        try:
-            message_json = json.dumps(message_dict)
-            self.ws.send(message_json)
+        # orjson 直接产出 UTF-8 bytes，以 TEXT 帧原样发送，
+        # 省去 bytes→str→bytes 的往返拷贝（音频消息的载荷不小）
+        success = self._submit(orjson.dumps(message_dict))
+        if success:
             logger.debug(f"发送消息: {message_dict.get('type', 'unknown')}")
-            return True
-        except Exception as e:
-            logger.error(f"发送消息失败: {e}")
-            return False
+        return success
 
-    def send_audio(self, audio_base64):
+    def send_audio(self, pcm_bytes):
         """
         发送音频数据
 
+        PCM 先聚合进预分配缓冲，凑够 audio_flush_bytes（或距上次发送
+        超过 audio_flush_interval）才真正发出一个 append 事件；
+        base64 编码在发送时集中完成（可用 pybase64 的 SIMD 实现加速）
+
         Args:
-            audio_base64: base64 编码的音频数据
+            pcm_bytes: 原始 PCM 音频数据 (bytes)
         """
-        message = {
-            "type": "input_audio_buffer.append",
-            "audio": audio_base64
-        }
-        return self.send_message(message)
+        n = len(pcm_bytes)
+
+        if self._audio_len + n > self.audio_flush_bytes:
+            # 装不下了：先把已积累的发出去
+            self._flush_audio()
+
+        if n >= self.audio_flush_bytes:
+            # 超大块不进缓冲，直接发送
+            return self._send_pcm(pcm_bytes)
+
+        self._audio_mv[self._audio_len:self._audio_len + n] = pcm_bytes
+        self._audio_len += n
+
+        if (self._audio_len >= self.audio_flush_bytes
+                or time.monotonic() - self._audio_last_flush > self.audio_flush_interval):
+            return self._flush_audio()
+
+        return True
+
+    def _flush_audio(self):
+        """把聚合缓冲中的 PCM 一次性发出"""
+        self._audio_last_flush = time.monotonic()
+
+        if not self._audio_len:
+            return True
+
+        success = self._send_pcm(self._audio_mv[:self._audio_len])
+        self._audio_len = 0
+        return success
+
+    def _send_pcm(self, pcm):
+        """编码并发送一段 PCM"""
+        if self.binary_audio:
+            # 二进制直发：省去 base64 的 1.33 倍体积膨胀和编码开销
+            # （复制成独立 bytes：聚合缓冲在消息真正发出前就会被复用）
+            return self._submit(bytes(pcm), binary=True)
+
+        # 模板化 JSON：一次 bytes 拼接代替 dict 分配 + json 序列化
+        payload = self._AUDIO_PREFIX + _b64encode(pcm) + self._AUDIO_SUFFIX
+        return self._submit(payload)
 
     def configure_session(self, instructions, vad_config):
         """
@@ -176,6 +334,9 @@ class RealtimeClient:
         Returns:
             bool: 是否成功提交
         """
+        # 先清空聚合缓冲，确保提交的缓冲区包含最后一段音频
+        self._flush_audio()
+
         message = {
             "type": "input_audio_buffer.commit"
         }
@@ -245,22 +406,26 @@ class RealtimeClient:
 
         return success
 
+    async def _close(self):
+        """在事件循环内关闭连接"""
+        if self._ws:
+            await self._ws.close()
+
     def disconnect(self):
         """断开连接"""
         logger.info("正在断开 WebSocket 连接...")
 
         self.is_connected = False
 
-        if self.ws:
+        if self._loop and self._loop.is_running():
             try:
-                self.ws.close()
+                future = asyncio.run_coroutine_threadsafe(self._close(), self._loop)
+                future.result(timeout=2)
             except Exception as e:
                 logger.warning(f"关闭 WebSocket 时出错: {e}")
-            finally:
-                self.ws = None
 
-        # 等待线程结束
-        if self.ws_thread and self.ws_thread.is_alive():
-            self.ws_thread.join(timeout=2)
+        # 等待事件循环线程结束
+        if self._loop_thread and self._loop_thread.is_alive():
+            self._loop_thread.join(timeout=2)
 
-        logger.info("✓ WebSocket 已断开")
\ No newline at end of file
+        logger.info("✓ WebSocket 已断开")
@@ -2,18 +2,41 @@
 事件处理器 - 支持并发翻译，修复原文译文匹配
 """
 from loguru import logger
+from collections import deque, OrderedDict
 from datetime import datetime
 import json
+import sys
 import time
 
 
+# 结果分隔线：常量化，避免每条结果都重新构造字符串
+_SEP60 = "-" * 60
+
+
+def _hms():
+    """当前时间的 HH:MM:SS 字符串（整数格式化，绕开 strftime 的 locale 开销）"""
+    lt = time.localtime()
+    return f"{lt.tm_hour:02d}:{lt.tm_min:02d}:{lt.tm_sec:02d}"
+
+
 class EventHandler:
     """事件处理器"""
 
+    # ID 映射表的容量上限（远大于同时在途的任务数即可）
+    _MAX_ID_MAPPINGS = 64
+
+    # 已知但完全不处理的高频事件：惰性解析模式下无需物化成 dict
+    PASSIVE_EVENTS = frozenset({
+        "response.output_item.added",
+        "response.content_part.added",
+        "response.content_part.done",
+    })
+
     def __init__(self, ui=None):
         """初始化事件处理器"""
         self.ui = ui
-        self.events_received = []
+        # 环形缓冲：只保留最近的事件类型，长会话不会无限增长
+        self.events_received = deque(maxlen=512)
 
         # 任务管理
         self.task_counter = 0
@@ -21,45 +44,17 @@ class EventHandler:
         self.last_task_id = None
 
         # ID 映射 - 用于正确匹配原文和译文
-        self.item_to_task = {}  # item_id → task_id
-        self.response_to_task = {}  # response_id → task_id
-
-        logger.info("事件处理器已初始化 (支持并发翻译)")
-
-    def handle_event(self, event_data):
-        """处理事件"""
-        event_type = event_data.get("type", "unknown")
-        self.events_received.append(event_type)
-
-        logger.debug(f"收到事件: {event_type}")
+        # 有界 OrderedDict：超过 _MAX_ID_MAPPINGS 条时淘汰最旧映射，
+        # 长会话下内存恒定（条目只增不删，普通 dict 会一直泄漏）
+        self.item_to_task = OrderedDict()  # item_id → task_id
+        self.response_to_task = OrderedDict()  # response_id → task_id
 
-        # 定义所有已知事件
-        known_events = [
-            "session.created",
-            "session.updated",
-            "input_audio_buffer.speech_started",
-            "input_audio_buffer.speech_stopped",
-            "input_audio_buffer.committed",
-            "conversation.item.created",
-            "conversation.item.input_audio_transcription.completed",
-            "response.created",
-            "response.output_item.added",
-            "response.output_item.done",
-            "response.content_part.added",
-            "response.content_part.done",
-            "response.text.delta",
-            "response.text.done",
-            "response.done",
-            "error"
-        ]
+        # 流式输出缓冲：按 50ms 间隔合并 delta，减少 write 系统调用
+        self._delta_buf = []
+        self._last_flush = time.monotonic()
 
-        # 记录未知事件
-        if event_type not in known_events:
-            logger.info(f"⚠️  未知事件 {event_type}")
-            logger.debug(f"完整数据: {json.dumps(event_data, indent=2, ensure_ascii=False)}")
-
-        # 事件处理器映射
-        handlers = {
+        # 分发表只构建一次：handle_event 在最热路径上被逐事件调用
+        self._handlers = {
             "session.created": self.on_session_created,
             "session.updated": self.on_session_updated,
             "input_audio_buffer.speech_started": self.on_speech_started,
@@ -67,6 +62,7 @@ class EventHandler:
             "input_audio_buffer.committed": self.on_audio_committed,
             "conversation.item.created": self.on_item_created,
             "conversation.item.input_audio_transcription.completed": self.on_transcription_completed,
+            "conversation.item.input_audio_transcription.failed": self.on_transcription_failed,
             "response.created": self.on_response_created,
             "response.output_item.done": self.on_output_item_done,
             "response.text.delta": self.on_text_delta,
@@ -75,7 +71,32 @@ class EventHandler:
             "error": self.on_error,
         }
 
-        handler = handlers.get(event_type)
+        # 已知事件集合（frozenset：O(1) 成员判断）
+        self._known_events = frozenset(self._handlers) | self.PASSIVE_EVENTS
+
+        logger.info("事件处理器已初始化 (支持并发翻译)")
+
+    def record_event(self, event_type):
+        """只登记事件类型，不处理内容（供惰性解析路径跳过物化时调用）"""
+        self.events_received.append(event_type)
+        logger.debug(f"收到事件: {event_type}")
+
+    def handle_event(self, event_data):
+        """处理事件"""
+        event_type = event_data.get("type", "unknown")
+        self.events_received.append(event_type)
+
+        logger.debug(f"收到事件: {event_type}")
+
+        # 记录未知事件
+        if event_type not in self._known_events:
+            logger.info(f"⚠️  未知事件 {event_type}")
+            # lazy=True：DEBUG 级别未启用时完全跳过 json.dumps
+            logger.opt(lazy=True).debug(
+                "完整数据: {}",
+                lambda: json.dumps(event_data, indent=2, ensure_ascii=False))
+
+        handler = self._handlers.get(event_type)
         if handler:
             handler(event_data)
 
@@ -108,13 +129,13 @@ class EventHandler:
 
     def on_speech_started(self, data):
         """检测到说话开始"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        timestamp = _hms()
         print(f"\n[{timestamp}] 🎤 检测到说话...")
         logger.info("检测到说话开始")
 
     def on_speech_stopped(self, data):
         """检测到说话结束（VAD 触发）"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        timestamp = _hms()
 
         task_id = self.create_task("vad")
 
@@ -138,6 +159,8 @@ class EventHandler:
         # 关联 response_id 和当前任务
         if response_id and self.last_task_id:
             self.response_to_task[response_id] = self.last_task_id
+            if len(self.response_to_task) > self._MAX_ID_MAPPINGS:
+                self.response_to_task.popitem(last=False)
             logger.debug(f"关联 response {response_id} → 任务 #{self.last_task_id}")
 
     def on_item_created(self, data):
@@ -149,6 +172,8 @@ class EventHandler:
         # 如果是用户消息，关联 item_id 和当前任务
         if item_role == "user" and item_id and self.last_task_id:
             self.item_to_task[item_id] = self.last_task_id
+            if len(self.item_to_task) > self._MAX_ID_MAPPINGS:
+                self.item_to_task.popitem(last=False)
             logger.debug(f"关联 item {item_id} → 任务 #{self.last_task_id}")
 
     def on_transcription_completed(self, data):
@@ -156,10 +181,12 @@ class EventHandler:
         转写完成 - 获取日语原文
         使用 item_id 找到对应的任务
         """
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        timestamp = _hms()
 
         logger.info(f"收到转写完成事件")
-        logger.debug(f"完整数据: {json.dumps(data, indent=2, ensure_ascii=False)}")
+        logger.opt(lazy=True).debug(
+            "完整数据: {}",
+            lambda: json.dumps(data, indent=2, ensure_ascii=False))
 
         # 获取 item_id 和转写文本
         item_id = data.get("item_id")
@@ -167,15 +194,23 @@ class EventHandler:
 
         if not transcript:
             logger.warning("转写事件中没有 transcript 字段")
+            # 空转写（近静音段常见）：原文不会再来，若译文已先到
+            # （awaiting_source）就用占位原文收尾，不能把译文吞掉
+            self._finalize_awaiting(item_id)
             return
 
         # 查找对应的任务 ID
         task_id = self.item_to_task.get(item_id, self.last_task_id)
 
         if task_id and task_id in self.active_tasks:
-            self.active_tasks[task_id]["source"] = transcript
+            task = self.active_tasks[task_id]
+            task["source"] = transcript
             print(f"[{timestamp}] 📝 原文 (任务 #{task_id}): {transcript}")
             logger.info(f"✓ 保存原文到任务 #{task_id}")
+
+            # 译文先到、原文后到：在这里补齐并输出完整结果
+            if task.get("status") == "awaiting_source":
+                self._finalize_task(task_id)
         else:
             # 如果找不到任务，仍然显示原文
             print(f"[{timestamp}] 📝 原文: {transcript}")
@@ -183,27 +218,69 @@ class EventHandler:
 
             # 尝试保存到最后的任务
             if self.last_task_id and self.last_task_id in self.active_tasks:
-                self.active_tasks[self.last_task_id]["source"] = transcript
+                task = self.active_tasks[self.last_task_id]
+                task["source"] = transcript
+                if task.get("status") == "awaiting_source":
+                    self._finalize_task(self.last_task_id)
+
+    def on_transcription_failed(self, data):
+        """
+        转写失败 - 原文确定缺失
+        挂起等待原文的译文在这里收尾输出，避免翻译结果被吞掉
+        """
+        item_id = data.get("item_id")
+        error = data.get("error", {})
+        logger.warning(f"转写失败: {error.get('message', 'unknown')} (item_id={item_id})")
+
+        self._finalize_awaiting(item_id)
+
+    def _finalize_awaiting(self, item_id):
+        """原文不会再到达时，把等待原文的任务用占位原文直接收尾"""
+        task_id = self.item_to_task.get(item_id, self.last_task_id)
+
+        if task_id and task_id in self.active_tasks:
+            if self.active_tasks[task_id].get("status") == "awaiting_source":
+                self._finalize_task(task_id)
 
     def on_output_item_done(self, data):
         """
         输出项完成 - 用于调试
         """
         logger.debug(f"收到 output_item.done 事件")
-        logger.debug(f"完整数据: {json.dumps(data, indent=2, ensure_ascii=False)}")
+        logger.opt(lazy=True).debug(
+            "完整数据: {}",
+            lambda: json.dumps(data, indent=2, ensure_ascii=False))
 
     def on_text_delta(self, data):
         """流式翻译（增量）"""
         delta = data.get("delta", "")
-        if delta:
-            print(delta, end="", flush=True)
+        if not delta:
+            return
+
+        # 缓冲增量，每 50ms（或遇到换行）刷新一次，保持"实时感"的同时
+        # 把 O(token) 次 write 降到 O(响应) 量级
+        self._delta_buf.append(delta)
+        now = time.monotonic()
+        if now - self._last_flush > 0.05 or '\n' in delta:
+            self._flush_deltas(now)
+
+    def _flush_deltas(self, now=None):
+        """把缓冲的流式增量一次性写到 stdout"""
+        if self._delta_buf:
+            sys.stdout.write(''.join(self._delta_buf))
+            sys.stdout.flush()
+            self._delta_buf.clear()
+        self._last_flush = now if now is not None else time.monotonic()
 
     def on_text_done(self, data):
         """
         翻译完成
-        如果原文还没到，等待一小段时间
+        如果原文还没到，挂起任务等待转写事件补齐（不阻塞 websocket 线程）
         """
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        # 先清空流式缓冲，避免最终结果插在半截增量中间
+        self._flush_deltas()
+
+        timestamp = _hms()
         text = data.get("text", "")
 
         logger.info(f"收到翻译结果: {text}")
@@ -218,40 +295,53 @@ class EventHandler:
         if task_id and task_id in self.active_tasks:
             task = self.active_tasks[task_id]
             task["translation"] = text
-            task["status"] = "completed"
 
-            # 如果原文还没到，等待 0.5 秒
+            # 如果原文还没到，标记挂起，由 on_transcription_completed 收尾
+            # （以前这里 sleep(1) 会卡住整个 websocket 读循环）
             if not task.get("source"):
+                task["status"] = "awaiting_source"
                 logger.debug(f"译文先到，等待原文... (任务 #{task_id})")
-                time.sleep(1)  # 等待原文事件
-
-            source = task.get("source") or "[未获取到原文]"
-            trigger = task.get("trigger", "unknown")
-
-            print(f"\n[{timestamp}] 🌐 译文 (任务 #{task_id}, {trigger}): {text}")
-            print(f"    原文: {source}")
-            print("-" * 60)
-
-            logger.info(f"✓ 翻译完成 (任务 #{task_id})")
+                return
 
-            # 清理旧任务（保留最近 10 个）
-            if len(self.active_tasks) > 10:
-                oldest_id = min(self.active_tasks.keys())
-                del self.active_tasks[oldest_id]
-                logger.debug(f"清理旧任务 #{oldest_id}")
+            self._finalize_task(task_id)
         else:
             # 如果找不到任务，仍然显示翻译
             print(f"\n[{timestamp}] 🌐 译文: {text}")
-            print("-" * 60)
+            print(_SEP60)
             logger.warning(f"未找到对应任务，task_id={task_id}")
 
+    def _finalize_task(self, task_id):
+        """输出任务的完整翻译结果并做收尾清理"""
+        task = self.active_tasks.get(task_id)
+        if not task:
+            return
+
+        task["status"] = "completed"
+
+        timestamp = _hms()
+        text = task.get("translation", "")
+        source = task.get("source") or "[未获取到原文]"
+        trigger = task.get("trigger", "unknown")
+
+        print(f"\n[{timestamp}] 🌐 译文 (任务 #{task_id}, {trigger}): {text}")
+        print(f"    原文: {source}")
+        print(_SEP60)
+
+        logger.info(f"✓ 翻译完成 (任务 #{task_id})")
+
+        # 清理旧任务（保留最近 10 个）
+        if len(self.active_tasks) > 10:
+            oldest_id = min(self.active_tasks.keys())
+            del self.active_tasks[oldest_id]
+            logger.debug(f"清理旧任务 #{oldest_id}")
+
     def on_response_done(self, data):
         """响应完成"""
         logger.debug("响应完成")
 
     def on_error(self, data):
         """错误处理"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        timestamp = _hms()
         error = data.get("error", {})
         message = error.get("message", "Unknown error")
 
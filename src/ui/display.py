@@ -7,8 +7,42 @@ from rich.panel import Panel
 from rich.console import Console
 from rich.live import Live
 from rich.text import Text
-from datetime import datetime
+from collections import deque
 from threading import Lock
+import time
+
+# 渲染用的静态查表：模块级常量，避免每次渲染重建 dict
+_STATUS_ICON = {
+    "detected": "🎤",
+    "stopped": "⏹️ ",
+    "processing": "⚙️ ",
+    "done": "✅"
+}
+
+_STATUS_TEXT = {
+    "detected": "检测到说话",
+    "stopped": "说话结束",
+    "processing": "正在处理",
+    "done": "处理完成"
+}
+
+# 历史记录分隔线
+_SEP50 = "─" * 50 + "\n"
+
+# 时间戳缓存：同一秒内的事件复用字符串，每秒最多格式化一次
+_hms_cache_sec = -1
+_hms_cache_str = ""
+
+
+def _hms():
+    """当前时间的 HH:MM:SS 字符串（整数格式化 + 按秒缓存）"""
+    global _hms_cache_sec, _hms_cache_str
+    now = int(time.time())
+    if now != _hms_cache_sec:
+        lt = time.localtime(now)
+        _hms_cache_str = f"{lt.tm_hour:02d}:{lt.tm_min:02d}:{lt.tm_sec:02d}"
+        _hms_cache_sec = now
+    return _hms_cache_str
 
 
 class TranslatorUI:
@@ -19,13 +53,21 @@ class TranslatorUI:
         self.layout = Layout()
 
         # 数据存储
-        self.active_tasks = []  # 当前正在处理的任务
-        self.history = []  # 历史翻译记录
+        # task_id → 任务信息：O(1) 查找，dict 本身保持插入顺序供渲染使用
+        self.active_tasks = {}
+        # 有界历史：只保留渲染需要的最近 20 条，旧记录自动淘汰；
+        # 累计条数单独计数（deque 的 len 封顶在 maxlen）
+        self.history = deque(maxlen=20)
+        self.history_total = 0
         self.lock = Lock()  # 线程锁
 
         # 创建布局
         self._setup_layout()
 
+        # 脏标记：状态变更只置位，面板重建推迟到 Live 的刷新线程（≤4Hz）
+        self._status_dirty = True
+        self._results_dirty = True
+
         # Live 显示对象
         self.live = None
 
@@ -39,10 +81,10 @@ class TranslatorUI:
     def start(self):
         """启动实时显示"""
         self.live = Live(
-            self.layout,
             console=self.console,
             refresh_per_second=4,  # 每秒刷新4次
-            screen=False
+            screen=False,
+            get_renderable=self._get_renderable
         )
         self.live.start()
 
@@ -54,92 +96,92 @@ class TranslatorUI:
     def add_task(self, task_id):
         """添加新任务到状态区"""
         with self.lock:
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            self.active_tasks.append({
+            timestamp = _hms()
+            self.active_tasks[task_id] = {
                 "id": task_id,
                 "timestamp": timestamp,
                 "status": "detected",  # detected, stopped, processing, done
                 "source_text": None,
                 "translation": None
-            })
-            self._update_display()
+            }
+            self._mark_dirty(status=True)
 
     def update_task_status(self, task_id, status):
         """更新任务状态"""
         with self.lock:
-            for task in self.active_tasks:
-                if task["id"] == task_id:
-                    task["status"] = status
-                    break
-            self._update_display()
+            task = self.active_tasks.get(task_id)
+            if task:
+                task["status"] = status
+            self._mark_dirty(status=True)
 
     def set_task_source(self, task_id, text):
         """设置任务的原文"""
         with self.lock:
-            for task in self.active_tasks:
-                if task["id"] == task_id:
-                    task["source_text"] = text
-                    break
-            self._update_display()
+            task = self.active_tasks.get(task_id)
+            if task:
+                task["source_text"] = text
+            self._mark_dirty(status=True)
 
     def complete_task(self, task_id, source_text, translation):
         """完成任务，移到历史记录"""
         with self.lock:
             # 从活动任务中移除
-            task_to_remove = None
-            for task in self.active_tasks:
-                if task["id"] == task_id:
-                    task_to_remove = task
-                    break
+            task_to_remove = self.active_tasks.pop(task_id, None)
 
             if task_to_remove:
-                self.active_tasks.remove(task_to_remove)
-
-                # 添加到历史记录
+                # 添加到历史记录（超出 maxlen 时自动淘汰最旧一条）
                 self.history.append({
                     "timestamp": task_to_remove["timestamp"],
                     "source": source_text or task_to_remove["source_text"],
                     "translation": translation
                 })
+                self.history_total += 1
+
+            self._mark_dirty(status=True, results=True)
+
+    def _mark_dirty(self, status=False, results=False):
+        """标记面板为脏，等待刷新线程重建（调用方需持有 self.lock）"""
+        if status:
+            self._status_dirty = True
+        if results:
+            self._results_dirty = True
+
+    def _get_renderable(self):
+        """Rich 刷新线程回调：只重建被标记为脏的面板，其余复用缓存"""
+        # 临界区只做快照和清标记，Panel/Text 构建放在锁外，
+        # websocket 线程不会被 Rich 渲染工作阻塞
+        with self.lock:
+            status_dirty = self._status_dirty
+            results_dirty = self._results_dirty
+            self._status_dirty = False
+            self._results_dirty = False
 
-            self._update_display()
+            tasks = [t.copy() for t in self.active_tasks.values()] if status_dirty else None
+            history = list(self.history) if results_dirty else None
+            history_total = self.history_total
 
-    def _update_display(self):
-        """更新显示内容"""
-        if not self.live:
-            return
+        if status_dirty:
+            self.layout["status"].update(self._render_status(tasks))
 
-        # 更新左侧状态区
-        self.layout["status"].update(self._render_status())
+        if results_dirty:
+            self.layout["results"].update(self._render_results(history, history_total))
 
-        # 更新右侧结果区
-        self.layout["results"].update(self._render_results())
+        return self.layout
 
-    def _render_status(self):
-        """渲染状态区"""
-        if not self.active_tasks:
+    def _render_status(self, tasks):
+        """渲染状态区（基于锁外持有的任务快照）"""
+        if not tasks:
             content = Text("等待语音输入...\n", style="dim")
         else:
             content = Text()
-            for i, task in enumerate(self.active_tasks, 1):
-                status_icon = {
-                    "detected": "🎤",
-                    "stopped": "⏹️ ",
-                    "processing": "⚙️ ",
-                    "done": "✅"
-                }.get(task["status"], "❓")
-
-                status_text = {
-                    "detected": "检测到说话",
-                    "stopped": "说话结束",
-                    "processing": "正在处理",
-                    "done": "处理完成"
-                }.get(task["status"], "未知状态")
+            for i, task in enumerate(tasks, 1):
+                status_icon = _STATUS_ICON.get(task["status"], "❓")
+                status_text = _STATUS_TEXT.get(task["status"], "未知状态")
 
                 content.append(f"{status_icon} 任务 #{task['id']} - {status_text}\n")
                 content.append(f"   时间: {task['timestamp']}\n", style="dim")
 
-                if i < len(self.active_tasks):
+                if i < len(tasks):
                     content.append("\n")
 
         return Panel(
@@ -148,22 +190,22 @@ class TranslatorUI:
             border_style="cyan"
         )
 
-    def _render_results(self):
-        """渲染结果区"""
-        if not self.history:
+    def _render_results(self, history, history_total):
+        """渲染结果区（基于锁外持有的历史快照）"""
+        if not history:
             content = Text("暂无翻译结果", style="dim italic")
         else:
             content = Text()
 
-            # 显示最近的记录（从新到旧）
-            for record in reversed(self.history[-20:]):  # 最多显示最近20条
+            # 显示最近的记录（从新到旧，deque 已限定为最近 20 条）
+            for record in reversed(history):
                 content.append(f"[{record['timestamp']}]\n", style="bold yellow")
                 content.append(f"📝 原文: {record['source']}\n", style="green")
                 content.append(f"🌐 译文: {record['translation']}\n", style="cyan")
-                content.append("─" * 50 + "\n", style="dim")
+                content.append(_SEP50, style="dim")
 
         return Panel(
             content,
-            title=f"[bold green]翻译结果[/bold green] (共 {len(self.history)} 条)",
+            title=f"[bold green]翻译结果[/bold green] (共 {history_total} 条)",
             border_style="green"
         )
\ No newline at end of file